@@ -0,0 +1,98 @@
+"""Storage backends for active Sudoku games."""
+import time
+from typing import Callable, List, Optional
+
+import redis.asyncio as redis
+from cachetools import TTLCache
+
+from sudoku_engine import SudokuBoard
+
+
+class MemoryGameStore:
+    """Keeps games in this process's memory.
+    
+    Bounded, and games expire an hour after they were last saved so abandoned
+    ones are freed. Only used from async handlers on the event loop, so no
+    lock is needed. Games are not shared between worker processes.
+    """
+    
+    def __init__(self, maxsize: int = 10_000, ttl: int = 3600,
+                 timer: Callable[[], float] = time.monotonic):
+        """Initialize the store.
+        
+        Args:
+            maxsize: Maximum number of games kept
+            ttl: Seconds a game is kept after it was last saved
+            timer: Clock the expiry times are measured on
+        """
+        self._games: TTLCache[str, SudokuBoard] = TTLCache(
+            maxsize=maxsize, ttl=ttl, timer=timer
+        )
+    
+    async def get(self, game_id: str) -> Optional[SudokuBoard]:
+        """Get a game, or None if it does not exist or has expired."""
+        return self._games.get(game_id)
+    
+    async def save(self, game_id: str, board: SudokuBoard) -> None:
+        """Store a game, restarting its expiry timer."""
+        self._games[game_id] = board
+    
+    async def delete(self, game_id: str) -> bool:
+        """Delete a game. Returns False if it did not exist."""
+        return self._games.pop(game_id, None) is not None
+    
+    async def list_ids(self) -> List[str]:
+        """List the IDs of all active games."""
+        # Drop expired games so they are not listed
+        self._games.expire()
+        return list(self._games.keys())
+    
+    async def close(self) -> None:
+        """Release resources held by the store."""
+
+
+class RedisGameStore:
+    """Keeps games in Redis so every worker process sees the same games.
+    
+    Each game is a single key holding the packed board and solution
+    (SudokuBoard.to_bytes), so a load or save is one round trip.
+    """
+    
+    KEY_PREFIX = "sudoku:game:"
+    
+    def __init__(self, url: str, ttl: int = 3600):
+        """Initialize the store.
+        
+        Args:
+            url: Redis connection URL, e.g. redis://localhost:6379/0
+            ttl: Seconds a game is kept after it was last saved
+        """
+        self._redis = redis.Redis.from_url(url)
+        self._ttl = ttl
+    
+    async def get(self, game_id: str) -> Optional[SudokuBoard]:
+        """Get a game, or None if it does not exist or has expired."""
+        data = await self._redis.get(self.KEY_PREFIX + game_id)
+        if data is None:
+            return None
+        return SudokuBoard.from_bytes(data)
+    
+    async def save(self, game_id: str, board: SudokuBoard) -> None:
+        """Store a game, restarting its expiry timer."""
+        await self._redis.set(self.KEY_PREFIX + game_id, board.to_bytes(), ex=self._ttl)
+    
+    async def delete(self, game_id: str) -> bool:
+        """Delete a game. Returns False if it did not exist."""
+        return await self._redis.delete(self.KEY_PREFIX + game_id) > 0
+    
+    async def list_ids(self) -> List[str]:
+        """List the IDs of all active games."""
+        prefix_len = len(self.KEY_PREFIX)
+        return [
+            key[prefix_len:].decode()
+            async for key in self._redis.scan_iter(match=self.KEY_PREFIX + "*")
+        ]
+    
+    async def close(self) -> None:
+        """Release resources held by the store."""
+        await self._redis.aclose()
@@ -1,53 +1,168 @@
 """FastAPI Sudoku game server."""
+from collections import deque
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from jinja2 import FileSystemBytecodeCache
 from pydantic import BaseModel, Field
-from typing import Dict, List, Literal
+from typing import Deque, Dict, List, Literal, Tuple
 from uuid import uuid4
+from game_store import MemoryGameStore, RedisGameStore
 from sudoku_engine import SudokuBoard
+import asyncio
+import functools
+import hashlib
+import logging
 import os
 import json
 
-app = FastAPI(title="Sudoku Game API", version="1.0.0")
-
-# Setup Jinja2 templates
+logger = logging.getLogger(__name__)
+
+# Storage for active games. Set REDIS_URL to share games between worker
+# processes; otherwise they are kept in this process's memory.
+if os.environ.get("REDIS_URL"):
+    store = RedisGameStore(os.environ["REDIS_URL"])
+else:
+    store = MemoryGameStore()
+
+# Pools of ready-made puzzles per difficulty, so creating a game is a pop.
+# A background task tops a pool back up to POOL_SIZE once it drops below
+# POOL_LOW_WATER and create_game sets the lifespan's app.state.pools_low.
+POOL_SIZE = 256
+POOL_LOW_WATER = 64
+puzzle_pools: Dict[str, Deque[SudokuBoard]] = {
+    difficulty: deque(maxlen=POOL_SIZE) for difficulty in ("easy", "medium", "hard")
+}
+
+def new_puzzle(difficulty: str) -> SudokuBoard:
+    """Generate a puzzle of the given difficulty."""
+    board = SudokuBoard()
+    board.generate_full_board()
+    board.remove_numbers(difficulty)
+    return board
+
+def new_puzzles(difficulty: str, count: int) -> List[SudokuBoard]:
+    """Generate a batch of puzzles of the given difficulty."""
+    return [new_puzzle(difficulty) for _ in range(count)]
+
+async def refill_puzzle_pools(pools_low: asyncio.Event) -> None:
+    """Keep the puzzle pools topped up, waiting for pools_low between rounds."""
+    while True:
+        pools_low.clear()
+        for difficulty, pool in puzzle_pools.items():
+            missing = POOL_SIZE - len(pool)
+            if missing:
+                # A full batch is enough work to be worth a thread
+                pool.extend(await asyncio.to_thread(new_puzzles, difficulty, missing))
+        await pools_low.wait()
+
+def log_refill_failure(task: asyncio.Task) -> None:
+    """Log why the refill task stopped, unless it was cancelled at shutdown."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Puzzle pool refill stopped", exc_info=task.exception())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Fill the puzzle pools in the background and release the store on shutdown."""
+    # The event belongs to this lifespan's loop, so it is made here rather
+    # than at import, where a second app run would find it bound elsewhere
+    app.state.pools_low = asyncio.Event()
+    refill_task = asyncio.create_task(refill_puzzle_pools(app.state.pools_low))
+    refill_task.add_done_callback(log_refill_failure)
+    yield
+    refill_task.cancel()
+    await store.close()
+
+
+app = FastAPI(
+    title="Sudoku Game API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Setup Jinja2 templates. Compiled templates are cached on disk so new
+# workers skip parsing them, and pages are only rendered once per process
+# (see render_page), so there is no point checking them for changes.
 templates = Jinja2Templates(directory="templates")
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+templates.env.auto_reload = False
 
-# In-memory storage for active games
-games: Dict[str, SudokuBoard] = {}
+# Languages with a translation file
+SUPPORTED_LANGS = ['en', 'nl', 'it', 'pt', 'fa']
 
-# Load translations
-translations = {}
-for lang in ['en', 'nl', 'it', 'pt', 'fa']:
+def flatten_translations(tree: dict, prefix: str = '') -> Dict[str, str]:
+    """Flatten nested translations into {"a.b.c": text} keyed by dotted path."""
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            flat.update(flatten_translations(value, f'{prefix}{key}.'))
+        elif isinstance(value, str):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+@functools.lru_cache(maxsize=len(SUPPORTED_LANGS))
+def load_translations(lang: str) -> Dict[str, str]:
+    """Load one language's translations, flattened, on first use.
+    
+    Files are only read when a page is first rendered in that language, so
+    API-only workers never load them.
+    """
     with open(f'translations/{lang}.json', 'r', encoding='utf-8') as f:
-        translations[lang] = json.load(f)
+        return flatten_translations(json.load(f))
 
 def get_translation(lang: str, key_path: str) -> str:
     """Get translation for a given language and key path."""
-    keys = key_path.split('.')
-    value = translations.get(lang, translations['en'])
-    for key in keys:
-        if isinstance(value, dict):
-            value = value.get(key, {})
-        else:
-            # If we encounter a non-dict value before traversing all keys,
-            # return the key_path as fallback
-            return key_path
-    return value if isinstance(value, str) else key_path
+    if lang not in SUPPORTED_LANGS:
+        lang = 'en'
+    # Unknown keys fall back to the key path itself
+    return load_translations(lang).get(key_path, key_path)
 
 # Add translation function to Jinja2 globals
 templates.env.globals['translate'] = get_translation
 
 def get_current_lang(request: Request) -> str:
     """Get current language from cookie or default to English."""
-    return request.cookies.get('lang', 'en')
+    lang = request.cookies.get('lang', 'en')
+    return lang if lang in SUPPORTED_LANGS else 'en'
+
+
+# Rendered HTML pages and their ETags keyed by (template name, language).
+# The pages only depend on the language, so each one is rendered once per
+# process.
+_pages: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+# Pages differ by the lang cookie, so caches must key on it
+PAGE_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600", "Vary": "Cookie"}
+
+def render_page(request: Request, template_name: str) -> Response:
+    """Return a page in the request's language, rendering it on first use.
+    
+    Responses carry caching headers and an ETag, and a request whose
+    If-None-Match matches the ETag gets an empty 304 instead of the page.
+    """
+    lang = get_current_lang(request)
+    key = (template_name, lang)
+    page = _pages.get(key)
+    if page is None:
+        html = templates.get_template(template_name).render(lang=lang)
+        etag = f'"{lang}-{hashlib.sha1(html.encode()).hexdigest()[:16]}"'
+        page = _pages[key] = (html, etag)
+    html, etag = page
+    
+    headers = {**PAGE_CACHE_HEADERS, "ETag": etag}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(html, headers=headers)
 
 @app.get("/set-lang/{lang}")
 async def set_language(lang: str, request: Request):
     """Set language preference and redirect back."""
-    if lang not in ['en', 'nl', 'it', 'pt', 'fa']:
+    if lang not in SUPPORTED_LANGS:
         lang = 'en'
     response = RedirectResponse(url=request.headers.get('referer', '/'), status_code=302)
     response.set_cookie(key='lang', value=lang, max_age=365*24*60*60)  # 1 year
@@ -70,14 +185,6 @@ class NewGameResponse(BaseModel):
     message: str
 
 
-class GameStateResponse(BaseModel):
-    """Response model for game state."""
-    game_id: str
-    board: List[List[int]]
-    is_complete: bool
-    is_correct: bool
-
-
 class MoveRequest(BaseModel):
     """Request model for making a move."""
     row: int = Field(..., ge=0, le=8, description="Row index (0-8)")
@@ -85,82 +192,58 @@ class MoveRequest(BaseModel):
     num: int = Field(..., ge=0, le=9, description="Number to place (1-9, or 0 to clear)")
 
 
-class MoveResponse(BaseModel):
-    """Response model for move result."""
-    success: bool
-    board: List[List[int]]
-    is_complete: bool
-    is_correct: bool
-    message: str
-
-
-class SolutionResponse(BaseModel):
-    """Response model for solution."""
-    game_id: str
-    solution: List[List[int]]
-
-
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """Root endpoint serving the game hub home page."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("home.html", {"request": request, "lang": lang})
+    return render_page(request, "home.html")
 
 
 @app.get("/sudoku", response_class=HTMLResponse)
 async def sudoku(request: Request):
     """Sudoku page endpoint serving the Sudoku game interface."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("index.html", {"request": request, "lang": lang})
+    return render_page(request, "index.html")
 
 
 @app.get("/tictactoe", response_class=HTMLResponse)
 async def tictactoe(request: Request):
     """Tic-Tac-Toe page endpoint."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("tictactoe.html", {"request": request, "lang": lang})
+    return render_page(request, "tictactoe.html")
 
 
 @app.get("/dots-and-boxes", response_class=HTMLResponse)
 async def dots_and_boxes(request: Request):
     """Dots and Boxes page endpoint."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("dots_and_boxes.html", {"request": request, "lang": lang})
+    return render_page(request, "dots_and_boxes.html")
 
 
 @app.get("/minesweeper", response_class=HTMLResponse)
 async def minesweeper(request: Request):
     """Minesweeper page endpoint."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("minesweeper.html", {"request": request, "lang": lang})
+    return render_page(request, "minesweeper.html")
 
 
 @app.get("/chess", response_class=HTMLResponse)
 async def chess(request: Request):
     """Chess page endpoint."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("chess.html", {"request": request, "lang": lang})
+    return render_page(request, "chess.html")
 
 
 @app.get("/connect-four", response_class=HTMLResponse)
 async def connect_four(request: Request):
     """Connect Four page endpoint."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("connect_four.html", {"request": request, "lang": lang})
+    return render_page(request, "connect_four.html")
 
 
 @app.get("/kenken", response_class=HTMLResponse)
 async def kenken(request: Request):
     """KenKen page endpoint."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("kenken.html", {"request": request, "lang": lang})
+    return render_page(request, "kenken.html")
 
 
 @app.get("/solitaire", response_class=HTMLResponse)
 async def solitaire(request: Request):
     """Solitaire (Peg Solitaire) page endpoint."""
-    lang = get_current_lang(request)
-    return templates.TemplateResponse("solitaire.html", {"request": request, "lang": lang})
+    return render_page(request, "solitaire.html")
 
 
 @app.get("/api")
@@ -179,6 +262,12 @@ async def api_root():
     }
 
 
+# Game handlers are async and run on the event loop, so they must not block.
+# Generating a single puzzle is an O(81) shuffle with no search and may stay
+# inline; batches (the pool refill) and anything that calls
+# SudokuBoard.solve() are CPU-bound and must be offloaded with
+# asyncio.to_thread.
+
 @app.post("/games/new", response_model=NewGameResponse)
 async def create_game(request: NewGameRequest):
     """Create a new Sudoku game.
@@ -191,23 +280,27 @@ async def create_game(request: NewGameRequest):
     """
     game_id = str(uuid4())
     
-    # Create new board
-    board = SudokuBoard()
-    board.generate_full_board()
-    board.remove_numbers(request.difficulty)
+    # Take a pregenerated board, or make one if the pool has run dry
+    pool = puzzle_pools[request.difficulty]
+    board = pool.popleft() if pool else new_puzzle(request.difficulty)
+    pools_low = getattr(app.state, "pools_low", None)
+    if pools_low is not None and len(pool) < POOL_LOW_WATER:
+        pools_low.set()
     
     # Store the game
-    games[game_id] = board
+    await store.save(game_id, board)
     
-    return NewGameResponse(
-        game_id=game_id,
-        board=board.get_board(),
-        difficulty=request.difficulty,
-        message=f"New {request.difficulty} game created successfully"
-    )
+    # Returned as-is: the response model documents the shape but the
+    # outbound dict is not re-validated
+    return ORJSONResponse({
+        "game_id": game_id,
+        "board": board.get_board(),
+        "difficulty": request.difficulty,
+        "message": f"New {request.difficulty} game created successfully"
+    })
 
 
-@app.get("/games/{game_id}", response_model=GameStateResponse)
+@app.get("/games/{game_id}")
 async def get_game_state(game_id: str):
     """Get the current state of a game.
     
@@ -217,20 +310,20 @@ async def get_game_state(game_id: str):
     Returns:
         Current board state and completion status
     """
-    if game_id not in games:
+    # Single lookup: an entry may expire between a membership test and a read
+    board = await store.get(game_id)
+    if board is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    board = games[game_id]
-    
-    return GameStateResponse(
-        game_id=game_id,
-        board=board.get_board(),
-        is_complete=board.is_complete(),
-        is_correct=board.is_correct() if board.is_complete() else False
-    )
+    return ORJSONResponse({
+        "game_id": game_id,
+        "board": board.get_board(),
+        "is_complete": board.is_complete(),
+        "is_correct": board.is_correct() if board.is_complete() else False
+    })
 
 
-@app.post("/games/{game_id}/move", response_model=MoveResponse)
+@app.post("/games/{game_id}/move")
 async def make_move(game_id: str, move: MoveRequest):
     """Make a move in the game.
     
@@ -241,22 +334,24 @@ async def make_move(game_id: str, move: MoveRequest):
     Returns:
         Move result and updated board state
     """
-    if game_id not in games:
+    board = await store.get(game_id)
+    if board is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    board = games[game_id]
-    
     # Attempt to place the number
     success = board.place_number(move.row, move.col, move.num)
     
+    # Save the move and restart the game's expiry timer
+    await store.save(game_id, board)
+    
     if not success:
-        return MoveResponse(
-            success=False,
-            board=board.get_board(),
-            is_complete=board.is_complete(),
-            is_correct=False,
-            message=f"Invalid move: cannot place {move.num} at ({move.row}, {move.col})"
-        )
+        return ORJSONResponse({
+            "success": False,
+            "board": board.get_board(),
+            "is_complete": board.is_complete(),
+            "is_correct": False,
+            "message": f"Invalid move: cannot place {move.num} at ({move.row}, {move.col})"
+        })
     
     is_complete = board.is_complete()
     is_correct = board.is_correct() if is_complete else False
@@ -268,16 +363,16 @@ async def make_move(game_id: str, move: MoveRequest):
         else:
             message = "Puzzle complete but solution is incorrect. Try again!"
     
-    return MoveResponse(
-        success=True,
-        board=board.get_board(),
-        is_complete=is_complete,
-        is_correct=is_correct,
-        message=message
-    )
+    return ORJSONResponse({
+        "success": True,
+        "board": board.get_board(),
+        "is_complete": is_complete,
+        "is_correct": is_correct,
+        "message": message
+    })
 
 
-@app.get("/games/{game_id}/solution", response_model=SolutionResponse)
+@app.get("/games/{game_id}/solution")
 async def get_solution(game_id: str):
     """Get the solution for a game.
     
@@ -287,15 +382,14 @@ async def get_solution(game_id: str):
     Returns:
         The complete solution
     """
-    if game_id not in games:
+    board = await store.get(game_id)
+    if board is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    board = games[game_id]
-    
-    return SolutionResponse(
-        game_id=game_id,
-        solution=board.get_solution()
-    )
+    return ORJSONResponse({
+        "game_id": game_id,
+        "solution": board.get_solution()
+    })
 
 
 @app.get("/games/{game_id}/validate")
@@ -308,11 +402,10 @@ async def validate_solution(game_id: str):
     Returns:
         Validation result
     """
-    if game_id not in games:
+    board = await store.get(game_id)
+    if board is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    board = games[game_id]
-    
     is_complete = board.is_complete()
     is_correct = board.is_correct() if is_complete else False
     
@@ -347,11 +440,9 @@ async def delete_game(game_id: str):
     Returns:
         Deletion confirmation
     """
-    if game_id not in games:
+    if not await store.delete(game_id):
         raise HTTPException(status_code=404, detail="Game not found")
     
-    del games[game_id]
-    
     return {"message": f"Game {game_id} deleted successfully"}
 
 
@@ -362,13 +453,25 @@ async def list_games():
     Returns:
         List of active game IDs
     """
+    game_ids = await store.list_ids()
+    
     return {
-        "active_games": len(games),
-        "game_ids": list(games.keys())
+        "active_games": len(game_ids),
+        "game_ids": game_ids
     }
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Worker processes come from WEB_CONCURRENCY. Without REDIS_URL games
+    # live in per-process memory, so the default is a single worker; with
+    # Redis it is one per core. uvloop and httptools are picked up
+    # automatically when installed (uvicorn[standard]).
+    default_workers = (os.cpu_count() or 1) if os.environ.get("REDIS_URL") else 1
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.environ.get("WEB_CONCURRENCY", default_workers))
+    )
 
@@ -1,11 +1,132 @@
 """Sudoku game engine with board generation, validation, and solving."""
+import math
 import random
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# A solved grid that every generated board is derived from
+_CANONICAL = np.array(
+    [[((i * 3 + i // 3 + j) % 9) + 1 for j in range(9)] for i in range(9)],
+    dtype=np.uint8
+)
+
+
+# Box index (0-8) of every cell, looked up by row * 9 + col
+_BOX_OF = tuple((row // 3) * 3 + col // 3 for row in range(9) for col in range(9))
+
+# Mask bit of every digit; index 0 (an empty cell) has no bit
+_BIT = (0,) + tuple(1 << i for i in range(9))
+
+# Number of set bits for every 9-bit candidate mask
+_POPCOUNT = tuple(bin(mask).count("1") for mask in range(512))
+_POPCOUNT_ARRAY = np.array(_POPCOUNT, dtype=np.int64)
+
+
+def _search(cells, row_mask, col_mask, box_mask, empty, stack_cand, popcount) -> bool:
+    """Fill the empty cells of a flat 9x9 grid in place by backtracking.
+    
+    Always branches on the empty cell with the fewest candidates and only
+    tries the digits still allowed there. Recursion is replaced by an
+    explicit stack held in two preallocated buffers: empty lists the
+    empty cells with the ones filled so far (the stack) in front, and
+    stack_cand holds the untried candidates of each filled one. Only the
+    still-empty tail is scanned at each step, never the whole grid.
+    
+    Only ints and indexing are used, so the same code runs on lists in
+    Python and on NumPy arrays when compiled with Numba.
+    
+    Args:
+        cells: 81 cell values, row by row (0 means empty)
+        row_mask, col_mask, box_mask: Used-digit masks for cells, updated
+            as digits are placed and undone
+        empty, stack_cand: Scratch buffers with room for 81 entries
+        popcount: Bit counts for every 9-bit mask (_POPCOUNT)
+        
+    Returns:
+        True if solved, False if no solution exists
+    """
+    count_empty = 0
+    for i in range(81):
+        if cells[i] == 0:
+            empty[count_empty] = i
+            count_empty += 1
+    
+    depth = 0
+    while True:
+        if depth == count_empty:
+            return True  # Board is complete
+        
+        # Pick the empty cell with the fewest candidates
+        best = depth
+        cand = 0
+        best_count = 10
+        for k in range(depth, count_empty):
+            i = empty[k]
+            row = i // 9
+            col = i % 9
+            mask = ~(row_mask[row] | col_mask[col] |
+                     box_mask[(row // 3) * 3 + col // 3]) & 0x1FF
+            count = popcount[mask]
+            if count < best_count:
+                best = k
+                cand = mask
+                best_count = count
+                if count <= 1:
+                    break  # Forced move or dead end
+        
+        # Move it to the top of the stack
+        idx = empty[best]
+        empty[best] = empty[depth]
+        empty[depth] = idx
+        
+        # Dead end: undo placements until a cell has candidates left
+        while cand == 0:
+            if depth == 0:
+                return False
+            depth -= 1
+            idx = empty[depth]
+            cand = stack_cand[depth]
+            row = idx // 9
+            col = idx % 9
+            bit = 1 << (cells[idx] - 1)
+            cells[idx] = 0
+            row_mask[row] ^= bit
+            col_mask[col] ^= bit
+            box_mask[(row // 3) * 3 + col // 3] ^= bit
+        
+        # Take the lowest remaining candidate digit
+        bit = cand & -cand
+        num = popcount[bit - 1] + 1
+        row = idx // 9
+        col = idx % 9
+        cells[idx] = num
+        row_mask[row] |= bit
+        col_mask[col] |= bit
+        box_mask[(row // 3) * 3 + col // 3] |= bit
+        stack_cand[depth] = cand ^ bit
+        depth += 1
+
+
+# Numba is optional: when installed the search is compiled on first use
+# (and cached on disk), otherwise solve() runs it as plain Python
+if njit is not None:
+    _search_jit = njit(cache=True)(_search)
+else:
+    _search_jit = None
 
 
 class SudokuBoard:
     """Represents a Sudoku board with game logic."""
     
+    __slots__ = ('size', 'board', 'solution', 'row_mask', 'col_mask', 'box_mask',
+                 '_board_listcache', '_valid_cache')
+    
     def __init__(self, size: int = 9):
         """Initialize a Sudoku board.
         
@@ -13,8 +134,18 @@ class SudokuBoard:
             size: Size of the board (default 9 for standard Sudoku)
         """
         self.size = size
-        self.board: List[List[int]] = [[0 for _ in range(size)] for _ in range(size)]
-        self.solution: List[List[int]] = [[0 for _ in range(size)] for _ in range(size)]
+        # Cells are stored as contiguous uint8 arrays (0 means empty)
+        self.board: np.ndarray = np.zeros((size, size), dtype=np.uint8)
+        self.solution: np.ndarray = np.zeros((size, size), dtype=np.uint8)
+        # Used digits per row, column and 3x3 box as 9-bit masks (bit n-1 set
+        # when digit n is present), kept in step with the board they describe
+        self.row_mask: List[int] = [0] * size
+        self.col_mask: List[int] = [0] * size
+        self.box_mask: List[int] = [0] * size
+        # board.tolist() as last returned by get_board, None once stale
+        self._board_listcache: Optional[List[List[int]]] = None
+        # is_valid_move answers for the current position, emptied on every change
+        self._valid_cache: Dict[Tuple[int, int, int], bool] = {}
         
     def is_valid_move(self, row: int, col: int, num: int) -> bool:
         """Check if placing num at (row, col) is valid according to Sudoku rules.
@@ -32,41 +163,52 @@ class SudokuBoard:
         Returns:
             True if the move is valid, False otherwise
         """
-        # Temporarily store the current value and clear the cell
-        current_value = self.board[row][col]
-        self.board[row][col] = 0
-        
-        # Rule 1: Check row - no duplicate in same row
-        for c in range(self.size):
-            if self.board[row][c] == num:
-                self.board[row][col] = current_value
-                return False
-        
-        # Rule 2: Check column - no duplicate in same column
-        for r in range(self.size):
-            if self.board[r][col] == num:
-                self.board[row][col] = current_value
-                return False
-        
-        # Rule 3: Check 3x3 box - no duplicate in same 3x3 box
-        # Calculate which 3x3 box this cell belongs to
-        box_row_start = 3 * (row // 3)
-        box_col_start = 3 * (col // 3)
-        
-        # Check all cells in the 3x3 box
-        for i in range(box_row_start, box_row_start + 3):
-            for j in range(box_col_start, box_col_start + 3):
-                if self.board[i][j] == num:
-                    self.board[row][col] = current_value
-                    return False
+        key = (row, col, num)
+        valid = self._valid_cache.get(key)
+        if valid is None:
+            if num == self.board[row, col]:
+                # Only a copy elsewhere in a unit blocks the cell's own digit
+                used = self._used_by_peers(row, col)
+            else:
+                # The masks hold every digit in the row, column and box, and
+                # the cell itself holds some other digit or none
+                used = (self.row_mask[row] | self.col_mask[col] |
+                        self.box_mask[_BOX_OF[row * 9 + col]])
+            valid = self._valid_cache[key] = not used & _BIT[num]
+        return valid
+    
+    def are_valid_moves(self, rows: Sequence[int], cols: Sequence[int],
+                        nums: Sequence[int]) -> np.ndarray:
+        """Check many moves at once, like is_valid_move, in one NumPy pass.
         
-        # Restore the original value and return success
-        self.board[row][col] = current_value
-        return True
+        Args:
+            rows: Row index (0-8) of each move
+            cols: Column index (0-8) of each move
+            nums: Number (1-9) of each move
+            
+        Returns:
+            Boolean array, True where the move is valid
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        one = np.uint16(1)
+        masks = np.array([self.row_mask, self.col_mask, self.box_mask], dtype=np.uint16)
+        used = masks[0, rows] | masks[1, cols] | masks[2, (rows // 3) * 3 + cols // 3]
+        nums = np.asarray(nums, dtype=np.uint16)
+        # As in is_valid_move, moves that repeat a cell's own digit are
+        # checked against the other cells in its row, column and box
+        for k in np.flatnonzero(self.board[rows, cols] == nums):
+            used[k] = self._used_by_peers(int(rows[k]), int(cols[k]))
+        # (1 << n) >> 1 is the bit for digit n
+        bits = (one << nums) >> one
+        return (used & bits) == 0
     
-    def solve(self, board: Optional[List[List[int]]] = None) -> bool:
+    def solve(self, board: Optional[np.ndarray] = None) -> bool:
         """Solve the Sudoku puzzle using backtracking.
         
+        The search runs compiled with Numba when it is installed and as plain
+        Python otherwise.
+        
         Args:
             board: Board to solve (uses self.board if None)
             
@@ -75,79 +217,110 @@ class SudokuBoard:
         """
         if board is None:
             board = self.board
-            
-        # Find empty cell
-        empty = self._find_empty_cell(board)
-        if not empty:
-            return True  # Board is complete
         
-        row, col = empty
+        cells = board.flatten()
+        self._load_masks(board.tolist())
+        if _search_jit is not None:
+            solved = _search_jit(
+                cells,
+                np.array(self.row_mask, dtype=np.int64),
+                np.array(self.col_mask, dtype=np.int64),
+                np.array(self.box_mask, dtype=np.int64),
+                np.zeros(cells.size, dtype=np.int64),
+                np.zeros(cells.size, dtype=np.int64),
+                _POPCOUNT_ARRAY
+            )
+        else:
+            # Search on plain lists: element access on an ndarray is much slower
+            cells = cells.tolist()
+            solved = _search(
+                cells, self.row_mask, self.col_mask, self.box_mask,
+                [0] * len(cells), [0] * len(cells), _POPCOUNT
+            )
         
-        # Try numbers 1-9
-        for num in range(1, 10):
-            if self._is_valid_for_board(board, row, col, num):
-                board[row][col] = num
-                
-                if self.solve(board):
-                    return True
-                
-                # Backtrack
-                board[row][col] = 0
+        if solved:
+            board[:] = np.asarray(cells, dtype=np.uint8).reshape(board.shape)
+            self._board_listcache = None
+        # The masks always describe self.board once we are done
+        self._load_masks(self.board.tolist())
+        return solved
+    
+    def candidates(self, row: int, col: int) -> int:
+        """Get every digit that is_valid_move would accept at (row, col).
         
-        return False
+        Args:
+            row: Row index (0-8)
+            col: Column index (0-8)
+            
+        Returns:
+            9-bit mask with bit n-1 set when digit n is allowed
+        """
+        if self.board[row, col]:
+            used = self._used_by_peers(row, col)
+        else:
+            used = (self.row_mask[row] | self.col_mask[col] |
+                    self.box_mask[_BOX_OF[row * 9 + col]])
+        return ~used & 0x1FF
+    
+    def _used_by_peers(self, row: int, col: int) -> int:
+        """Get the mask of digits in the row, column and box of (row, col).
+        
+        The cell itself is left out, so replacing its digit is not blocked by
+        that digit, while a copy of it elsewhere in the same units still is.
+        """
+        grid = self.get_board()
+        top = row - row % 3
+        left = col - col % 3
+        used = 0
+        for k in range(9):
+            if k != col:
+                used |= _BIT[grid[row][k]]
+            if k != row:
+                used |= _BIT[grid[k][col]]
+            box_row = top + k // 3
+            box_col = left + k % 3
+            if box_row != row or box_col != col:
+                used |= _BIT[grid[box_row][box_col]]
+        return used
     
-    def _find_empty_cell(self, board: List[List[int]]) -> Optional[Tuple[int, int]]:
-        """Find an empty cell (with value 0) in the board."""
+    def _load_masks(self, board: List[List[int]]) -> None:
+        """Rebuild the row, column and box masks from the given board."""
+        self._valid_cache.clear()
+        self.row_mask = [0] * self.size
+        self.col_mask = [0] * self.size
+        self.box_mask = [0] * self.size
         for i in range(self.size):
             for j in range(self.size):
-                if board[i][j] == 0:
-                    return (i, j)
-        return None
-    
-    def _is_valid_for_board(self, board: List[List[int]], row: int, col: int, num: int) -> bool:
-        """Check if placing num at (row, col) is valid for a specific board."""
-        # Check row
-        if num in board[row]:
-            return False
-        
-        # Check column
-        if num in [board[i][col] for i in range(self.size)]:
-            return False
-        
-        # Check 3x3 box
-        box_row, box_col = 3 * (row // 3), 3 * (col // 3)
-        for i in range(box_row, box_row + 3):
-            for j in range(box_col, box_col + 3):
-                if board[i][j] == num:
-                    return False
-        
-        return True
+                bit = _BIT[board[i][j]]
+                self.row_mask[i] |= bit
+                self.col_mask[j] |= bit
+                self.box_mask[_BOX_OF[i * 9 + j]] |= bit
     
     def generate_full_board(self) -> None:
-        """Generate a complete valid Sudoku board."""
-        # Start with empty board
-        self.board = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        """Generate a complete valid Sudoku board.
         
-        # Fill diagonal 3x3 boxes first (they don't affect each other)
-        for box in range(0, self.size, 3):
-            self._fill_box(box, box)
+        Rather than searching, a fixed solved grid is shuffled with
+        transformations that keep it valid: relabelling digits, reordering
+        bands/stacks and the rows/columns within them, and transposing.
+        """
+        # Lookup table mapping each canonical digit (index) to its new label
+        digits = np.array([0] + random.sample(range(1, 10), 9), dtype=np.uint8)
+        grid = _CANONICAL.T if random.getrandbits(1) else _CANONICAL
+        grid = grid[np.ix_(self._shuffled_lines(), self._shuffled_lines())]
         
-        # Solve the rest
-        self.solve()
+        self.board = digits[grid]
+        self._board_listcache = None
         
         # Store the solution
-        self.solution = [row[:] for row in self.board]
+        self.solution = self.board.copy()
+        self._load_masks(self.board.tolist())
     
-    def _fill_box(self, row_start: int, col_start: int) -> None:
-        """Fill a 3x3 box with random valid numbers."""
-        nums = list(range(1, 10))
-        random.shuffle(nums)
-        
-        idx = 0
-        for i in range(3):
-            for j in range(3):
-                self.board[row_start + i][col_start + j] = nums[idx]
-                idx += 1
+    @staticmethod
+    def _shuffled_lines() -> List[int]:
+        """Random row (or column) order that keeps every line in its band."""
+        return [band * 3 + line
+                for band in random.sample(range(3), 3)
+                for line in random.sample(range(3), 3)]
     
     def remove_numbers(self, difficulty: str = "medium") -> None:
         """Remove numbers from the board based on difficulty.
@@ -163,13 +336,12 @@ class SudokuBoard:
             "hard": random.randint(50, 55)
         }.get(difficulty, 40)
         
-        # Remove numbers randomly
-        cells = [(i, j) for i in range(self.size) for j in range(self.size)]
-        random.shuffle(cells)
+        # Remove numbers randomly, picking flat cell indices (row * size + col)
+        cells = random.sample(range(self.size * self.size), remove_count)
+        self.board.flat[cells] = 0
         
-        for i in range(remove_count):
-            row, col = cells[i]
-            self.board[row][col] = 0
+        self._board_listcache = None
+        self._load_masks(self.board.tolist())
     
     def place_number(self, row: int, col: int, num: int) -> bool:
         """Place a number on the board.
@@ -186,33 +358,172 @@ class SudokuBoard:
             return False
         
         if num == 0:
-            self.board[row][col] = 0
+            self.clear(row, col)
             return True
         
         if not (1 <= num <= 9):
             return False
         
         if self.is_valid_move(row, col, num):
-            self.board[row][col] = num
+            self.place(row, col, num)
             return True
         
         return False
     
+    def place(self, row: int, col: int, num: int) -> None:
+        """Write num (1-9) into a cell without checking the Sudoku rules.
+        
+        This is the way to set up a board directly: unlike writing to
+        self.board, it keeps the masks used by the checks in step.
+        
+        Args:
+            row: Row index (0-8)
+            col: Column index (0-8)
+            num: Number to place (1-9)
+        """
+        self.clear(row, col)
+        bit = _BIT[num]
+        self.board[row, col] = num
+        self.row_mask[row] |= bit
+        self.col_mask[col] |= bit
+        self.box_mask[_BOX_OF[row * 9 + col]] |= bit
+        self._board_listcache = None
+        self._valid_cache.clear()
+    
+    def clear(self, row: int, col: int) -> None:
+        """Empty a cell, keeping the masks in step.
+        
+        Args:
+            row: Row index (0-8)
+            col: Column index (0-8)
+        """
+        if not self.board[row, col]:
+            return
+        self.board[row, col] = 0
+        self._board_listcache = None
+        self._valid_cache.clear()
+        
+        # The digit may still be elsewhere in a unit (place does not check),
+        # so the three masks are rebuilt from the board instead of unset
+        grid = self.get_board()
+        box = _BOX_OF[row * 9 + col]
+        top = box // 3 * 3
+        left = box % 3 * 3
+        row_used = col_used = box_used = 0
+        for k in range(9):
+            row_used |= _BIT[grid[row][k]]
+            col_used |= _BIT[grid[k][col]]
+            box_used |= _BIT[grid[top + k // 3][left + k % 3]]
+        self.row_mask[row] = row_used
+        self.col_mask[col] = col_used
+        self.box_mask[box] = box_used
+    
+    def load_cells(self, cells: Sequence[Tuple[int, int, int]]) -> None:
+        """Write many cells at once without checking the Sudoku rules.
+        
+        Like place (or clear, for a 0) on each cell, but the board is written
+        in one NumPy assignment and the masks are rebuilt once afterwards.
+        
+        Args:
+            cells: (row, col, num) triples, num being 1-9 or 0 to clear
+        
+        Raises:
+            ValueError: If a triple is out of range, before anything is written
+        """
+        rows, cols, nums = np.asarray(cells, dtype=np.intp).reshape(-1, 3).T
+        # Checked up front so a bad triple cannot leave the board half written
+        # (and out of step with the masks)
+        if ((rows < 0) | (rows >= self.size) | (cols < 0) | (cols >= self.size)).any():
+            raise ValueError(f"Rows and columns must be 0-{self.size - 1}")
+        if ((nums < 0) | (nums > 9)).any():
+            raise ValueError("Numbers must be 1-9, or 0 to clear")
+        self.board[rows, cols] = nums
+        self._board_listcache = None
+        self._load_masks(self.board.tolist())
+    
     def is_complete(self) -> bool:
         """Check if the board is completely filled."""
-        for row in self.board:
-            if 0 in row:
-                return False
-        return True
+        return bool(self.board.all())
     
     def is_correct(self) -> bool:
         """Check if the current board matches the solution."""
-        return self.board == self.solution
+        return bool(np.array_equal(self.board, self.solution))
     
     def get_board(self) -> List[List[int]]:
-        """Get the current board state."""
-        return [row[:] for row in self.board]
+        """Get the current board state.
+        
+        The list is cached until the board changes through this class and is
+        shared between calls, so callers must not modify it.
+        """
+        if self._board_listcache is None:
+            self._board_listcache = self.board.tolist()
+        return self._board_listcache
     
     def get_solution(self) -> List[List[int]]:
         """Get the solution board."""
-        return [row[:] for row in self.solution]
+        return self.solution.tolist()
+    
+    def copy(self) -> "SudokuBoard":
+        """Return an independent copy of this board.
+        
+        The arrays and masks are copied as they are, so nothing is rebuilt
+        the way a fresh SudokuBoard plus place() calls would.
+        """
+        new = object.__new__(SudokuBoard)
+        new.size = self.size
+        new.board = self.board.copy()
+        new.solution = self.solution.copy()
+        new.row_mask = self.row_mask.copy()
+        new.col_mask = self.col_mask.copy()
+        new.box_mask = self.box_mask.copy()
+        new._board_listcache = None
+        new._valid_cache = self._valid_cache.copy()
+        return new
+    
+    def to_bytes(self) -> bytes:
+        """Pack the board and solution into one byte string (one byte per cell)."""
+        return self.board.tobytes() + self.solution.tobytes()
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SudokuBoard":
+        """Rebuild a board packed with to_bytes().
+        
+        Args:
+            data: Board cells followed by solution cells, row by row
+            
+        Returns:
+            A new SudokuBoard with masks rebuilt from the board
+        """
+        cells = np.frombuffer(data, dtype=np.uint8)
+        size = math.isqrt(len(cells) // 2)
+        board = cls(size)
+        # frombuffer views are read-only, so copy into writable arrays
+        board.board = cells[:size * size].reshape(size, size).copy()
+        board.solution = cells[size * size:].reshape(size, size).copy()
+        board._load_masks(board.board.tolist())
+        return board
+    
+    @classmethod
+    def from_string(cls, puzzle: str, size: int = 9) -> "SudokuBoard":
+        """Build a board from one character per cell, row by row.
+        
+        Args:
+            puzzle: Digits 1-9 for filled cells and 0 or . for empty ones
+            size: Size of the board (default 9 for standard Sudoku)
+        
+        Returns:
+            A new SudokuBoard holding the puzzle, with its masks loaded
+        
+        Raises:
+            ValueError: If puzzle has the wrong length or other characters
+        """
+        if len(puzzle) != size * size:
+            raise ValueError(f"Expected {size * size} cells, got {len(puzzle)}")
+        data = puzzle.replace(".", "0").encode("ascii", errors="replace")
+        cells = np.frombuffer(data, dtype=np.uint8) - ord("0")
+        if (cells > 9).any():
+            raise ValueError("Cells must be digits 1-9, 0 or .")
+        board = cls(size)
+        board.board = cells.reshape(size, size)
+        board._load_masks(board.board.tolist())
+        return board
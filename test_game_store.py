@@ -0,0 +1,63 @@
+"""Tests for the in-memory game store in game_store.py."""
+import asyncio
+
+from game_store import MemoryGameStore
+from sudoku_engine import SudokuBoard
+
+class FakeClock:
+    """Timer for the store that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def test_get_returns_saved_game():
+    store = MemoryGameStore()
+    board = SudokuBoard()
+    asyncio.run(store.save("a", board))
+    assert asyncio.run(store.get("a")) is board
+    assert asyncio.run(store.get("b")) is None
+
+def test_game_expires_after_ttl():
+    clock = FakeClock()
+    store = MemoryGameStore(ttl=10, timer=clock)
+    asyncio.run(store.save("a", SudokuBoard()))
+    clock.now = 10
+    assert asyncio.run(store.get("a")) is None
+
+def test_save_restarts_ttl():
+    clock = FakeClock()
+    store = MemoryGameStore(ttl=10, timer=clock)
+    board = SudokuBoard()
+    asyncio.run(store.save("a", board))
+    clock.now = 8
+    asyncio.run(store.save("a", board))
+    clock.now = 16
+    assert asyncio.run(store.get("a")) is board
+    clock.now = 18
+    assert asyncio.run(store.get("a")) is None
+
+def test_delete_reports_whether_game_existed():
+    store = MemoryGameStore()
+    asyncio.run(store.save("a", SudokuBoard()))
+    assert asyncio.run(store.delete("a")) is True
+    assert asyncio.run(store.delete("a")) is False
+    assert asyncio.run(store.get("a")) is None
+
+def test_list_ids_skips_expired_games():
+    clock = FakeClock()
+    store = MemoryGameStore(ttl=10, timer=clock)
+    asyncio.run(store.save("old", SudokuBoard()))
+    clock.now = 5
+    asyncio.run(store.save("new", SudokuBoard()))
+    clock.now = 12
+    assert asyncio.run(store.list_ids()) == ["new"]
+
+def test_maxsize_evicts_oldest_game():
+    store = MemoryGameStore(maxsize=2)
+    for game_id in ("a", "b", "c"):
+        asyncio.run(store.save(game_id, SudokuBoard()))
+    assert sorted(asyncio.run(store.list_ids())) == ["b", "c"]
+    assert asyncio.run(store.get("a")) is None
@@ -0,0 +1,67 @@
+"""Tests for the FastAPI app in main.py."""
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+
+def wait_for(condition, timeout=5.0):
+    """Poll condition until it holds or timeout seconds have passed."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_pools_refill_in_every_lifespan():
+    pool = main.puzzle_pools["easy"]
+    # A second lifespan runs on a new event loop and must still refill
+    for _ in range(2):
+        with TestClient(main.app) as client:
+            assert wait_for(lambda: len(pool) == main.POOL_SIZE)
+            for _ in range(main.POOL_SIZE - main.POOL_LOW_WATER + 10):
+                response = client.post("/games/new", json={"difficulty": "easy"})
+                assert response.status_code == 200
+            assert wait_for(lambda: len(pool) == main.POOL_SIZE)
+
+def test_page_etag_and_not_modified():
+    with TestClient(main.app) as client:
+        response = client.get("/sudoku")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        assert response.headers["vary"] == "Cookie"
+        
+        response = client.get("/sudoku", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert not response.content
+        
+        # The page differs by language, and so must its ETag
+        client.cookies.set("lang", "nl")
+        response = client.get("/sudoku", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+def test_flatten_translations_keeps_only_strings():
+    tree = {"a": {"b": "text", "count": 3, "items": ["x"], "c": {"d": "deep"}}}
+    assert main.flatten_translations(tree) == {"a.b": "text", "a.c.d": "deep"}
+
+def test_translation_lookup_and_fallbacks():
+    assert main.get_translation("en", "games.sudoku.time") == "Time"
+    assert main.get_translation("nl", "home.title") == "Spel Hub"
+    # Unknown keys, and keys naming a whole section, give the key path back
+    assert main.get_translation("en", "games.sudoku.missing") == "games.sudoku.missing"
+    assert main.get_translation("en", "games.sudoku") == "games.sudoku"
+    # Unknown languages fall back to English
+    assert main.get_translation("xx", "games.sudoku.time") == "Time"
+
+def test_translations_load_once_per_language():
+    main.load_translations.cache_clear()
+    for _ in range(3):
+        for lang in ("en", "nl", "xx"):
+            main.get_translation(lang, "home.title")
+    info = main.load_translations.cache_info()
+    assert (info.misses, info.currsize) == (2, 2)
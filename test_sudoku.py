@@ -1,95 +1,350 @@
-"""Test script to verify Sudoku constraints."""
+"""Tests for the Sudoku row, column and 3x3 box constraints.
+
+Run them with pytest (add -n auto with pytest-xdist to spread the cases over
+all cores), or run this file directly for a readable report (-q prints only
+the summary).
+"""
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import sudoku_engine
 from sudoku_engine import SudokuBoard
 
-def test_3x3_constraint():
-    """Test that 3x3 box constraint is enforced."""
+# Status labels indexed by the move check result (False, True)
+EXPECT_BLOCKED = ("✅ BLOCKED (correct)", "❌ ALLOWED (BUG!)")
+EXPECT_ALLOWED = ("❌ BLOCKED (BUG!)", "✅ ALLOWED (correct)")
+# The labels above indexed by the expected result
+STATUS = (EXPECT_BLOCKED, EXPECT_ALLOWED)
+
+# Report line prefixes for the checks made in loops
+POSITION_TPL = "  Position (%d,%d): "
+NUMBER_TPL = "  Number %d: "
+LINE_TPL = "Trying to place 7 at (%d,%d) same %s: "
+
+# Outcome of every reported check so far, True where it passed
+CHECKS = []
+
+# Every scenario starts from a copy of this empty board
+EMPTY_BOARD = SudokuBoard()
+
+# Other cells of the top-left box, where a second 5 must be blocked
+BOX_POSITIONS = [
+    (0, 1), (0, 2),  # Same row, same box
+    (1, 0), (1, 1), (1, 2),  # Second row, same box
+    (2, 0), (2, 1), (2, 2)   # Third row, same box
+]
+
+# Cells outside the top-left box and whether a second 5 is allowed there
+OUTSIDE_BOX = [
+    (0, 3, False),  # Different box, same row
+    (3, 0, False),  # Different box, same column
+    (4, 4, True),   # Different box, row and column
+]
+
+# Top-left box filled with 1-8, leaving (2,2) empty for the 9
+BOX_PUZZLE = (
+    "123......"
+    "456......"
+    "78......."
+) + "." * 54
+
+# Cells sharing only a row or a column with a 7 at (0,0)
+LINE_POSITIONS = [(0, 8), (8, 0)]
+
+def board_with(cells):
+    """Copy the empty board and fill in the given (row, col, num) cells."""
+    board = EMPTY_BOARD.copy()
+    board.load_cells(cells)
+    return board
+
+@pytest.mark.parametrize("row,col", BOX_POSITIONS)
+def test_box_blocks_repeat(row, col):
+    assert not board_with([(0, 0, 5)]).is_valid_move(row, col, 5)
+
+@pytest.mark.parametrize("row,col,allowed", OUTSIDE_BOX)
+def test_outside_box(row, col, allowed):
+    assert board_with([(0, 0, 5)]).is_valid_move(row, col, 5) == allowed
+
+def test_box_allows_missing_digit():
+    board = SudokuBoard.from_string(BOX_PUZZLE)
+    assert board.is_valid_move(2, 2, 9)
+    assert board.candidates(2, 2) == 1 << 8
+
+@pytest.mark.parametrize("num", range(1, 9))
+def test_box_blocks_present_digit(num):
+    assert not SudokuBoard.from_string(BOX_PUZZLE).is_valid_move(2, 2, num)
+
+def test_from_string_matches_load_cells():
+    board = SudokuBoard.from_string(BOX_PUZZLE)
+    expected = board_with([
+        (0, 0, 1), (0, 1, 2), (0, 2, 3),
+        (1, 0, 4), (1, 1, 5), (1, 2, 6),
+        (2, 0, 7), (2, 1, 8),
+    ])
+    assert board.get_board() == expected.get_board()
+    assert board.box_mask == expected.box_mask
+
+# A valid triple followed by one bad one, so a partial write would show
+BAD_CELLS = [
+    [(4, 4, 1), (0, 0, 10)],
+    [(4, 4, 1), (0, 0, -1)],
+    [(4, 4, 1), (9, 0, 1)],
+    [(4, 4, 1), (0, -1, 1)],
+]
+
+@pytest.mark.parametrize("cells", BAD_CELLS)
+def test_load_cells_rejects_bad_cell(cells):
+    board = board_with([(0, 0, 5)])
+    with pytest.raises(ValueError):
+        board.load_cells(cells)
+    assert board.get_board() == board_with([(0, 0, 5)]).get_board()
+    assert board.row_mask == board_with([(0, 0, 5)]).row_mask
+
+@pytest.mark.parametrize("row,col", LINE_POSITIONS)
+def test_row_and_column_block_repeat(row, col):
+    assert not board_with([(0, 0, 7)]).is_valid_move(row, col, 7)
+
+# Cells sharing a row, a column or a box with (0,0), for duplicate digits
+PEER_POSITIONS = [(0, 5), (5, 0), (1, 1)]
+
+@pytest.mark.parametrize("row,col", PEER_POSITIONS)
+def test_clear_keeps_duplicate_digit(row, col):
+    # place does not check the rules, so a unit can hold the same digit twice
+    board = board_with([(0, 0, 5), (row, col, 5)])
+    board.clear(row, col)
+    assert not board.is_valid_move(0, 8, 5)
+    assert not board.is_valid_move(8, 0, 5)
+    assert not board.is_valid_move(2, 2, 5)
+
+@pytest.mark.parametrize("row,col", PEER_POSITIONS)
+def test_own_digit_blocked_by_duplicate(row, col):
+    board = board_with([(0, 0, 5), (row, col, 5)])
+    assert not board.is_valid_move(0, 0, 5)
+    assert not board.are_valid_moves([0], [0], [5])[0]
+    assert not board.candidates(0, 0) & 1 << 4
+
+@pytest.mark.parametrize("puzzle", [BOX_PUZZLE, "53..7...." + "." * 72])
+def test_are_valid_moves_matches_is_valid_move(puzzle):
+    board = SudokuBoard.from_string(puzzle)
+    # Every digit at every cell, filled ones included
+    moves = [(row, col, num) for row in range(9) for col in range(9) for num in range(1, 10)]
+    rows, cols, nums = zip(*moves)
+    expected = [board.is_valid_move(row, col, num) for row, col, num in moves]
+    assert board.are_valid_moves(rows, cols, nums).tolist() == expected
+
+def test_are_valid_moves_accepts_no_moves():
+    assert board_with([(0, 0, 5)]).are_valid_moves([], [], []).tolist() == []
+
+# A puzzle with one solution, and one whose (0,8) has no digit left
+SOLVABLE_PUZZLE = (
+    "53..7...."
+    "6..195..."
+    ".98....6."
+    "8...6...3"
+    "4..8.3..1"
+    "7...2...6"
+    ".6....28."
+    "...419..5"
+    "....8..79"
+)
+UNSOLVABLE_PUZZLE = "12345678." + "........9" + "." * 63
+
+# Both ways solve() can search; Numba is optional
+SEARCHES = [
+    pytest.param("jit", marks=pytest.mark.skipif(
+        sudoku_engine._search_jit is None, reason="numba is not installed")),
+    "python",
+]
+
+@pytest.fixture(params=SEARCHES)
+def search(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(sudoku_engine, "_search_jit", None)
+    return request.param
+
+def is_solved(grid):
+    digits = set(range(1, 10))
+    boxes = [
+        [grid[row][col] for row in range(top, top + 3) for col in range(left, left + 3)]
+        for top in range(0, 9, 3) for left in range(0, 9, 3)
+    ]
+    columns = [list(column) for column in zip(*grid)]
+    return all(set(unit) == digits for unit in grid + columns + boxes)
+
+def test_generated_boards_are_solved():
     board = SudokuBoard()
+    for _ in range(200):
+        board.generate_full_board()
+        assert is_solved(board.get_board())
+        assert board.get_solution() == board.get_board()
+        assert board.row_mask == board.col_mask == board.box_mask == [0x1FF] * 9
+
+def test_solve_fills_valid_board(search):
+    board = SudokuBoard.from_string(SOLVABLE_PUZZLE)
+    givens = board.get_board()
+    # Cached before the solve, and stale once (0,2) is filled
+    assert board.is_valid_move(0, 2, 1)
+    assert board.solve()
+    grid = board.get_board()
+    assert is_solved(grid)
+    assert all(
+        grid[row][col] == givens[row][col]
+        for row in range(9) for col in range(9) if givens[row][col]
+    )
+    # Every digit is now used in every unit
+    assert board.row_mask == board.col_mask == board.box_mask == [0x1FF] * 9
+    assert board.is_valid_move(0, 2, grid[0][2])
+    assert not board.is_valid_move(0, 2, 1)
+
+def test_solve_leaves_unsolvable_board(search):
+    board = SudokuBoard.from_string(UNSOLVABLE_PUZZLE)
+    assert not board.solve()
+    expected = SudokuBoard.from_string(UNSOLVABLE_PUZZLE)
+    assert board.get_board() == expected.get_board()
+    assert board.row_mask == expected.row_mask
+    assert board.col_mask == expected.col_mask
+    assert board.box_mask == expected.box_mask
+
+# Every way of changing a board, each of which must invalidate get_board's list
+CHANGES = {
+    "place": lambda board: board.place(4, 4, 1),
+    "clear": lambda board: board.clear(0, 0),
+    "remove_numbers": lambda board: board.remove_numbers("hard"),
+    "generate_full_board": lambda board: board.generate_full_board(),
+    "solve": lambda board: board.solve(),
+    "load_cells": lambda board: board.load_cells([(4, 4, 1)]),
+}
+
+@pytest.mark.parametrize("change", CHANGES.values(), ids=CHANGES.keys())
+def test_get_board_shows_change(change):
+    board = SudokuBoard.from_string(SOLVABLE_PUZZLE)
+    before = board.get_board()
+    # Fetched twice so the cached list is in use when the board changes
+    assert board.get_board() is before
+    change(board)
+    assert board.get_board() != before
+    assert board.get_board() == board.board.tolist()
+
+# Cells each difficulty removes from a full board
+REMOVED = {"easy": (30, 35), "medium": (40, 45), "hard": (50, 55)}
+
+@pytest.mark.parametrize("difficulty", REMOVED)
+def test_remove_numbers_count(difficulty):
+    low, high = REMOVED[difficulty]
+    board = SudokuBoard()
+    for _ in range(20):
+        board.generate_full_board()
+        board.remove_numbers(difficulty)
+        assert low <= sum(row.count(0) for row in board.get_board()) <= high
+
+def test_bytes_round_trip():
+    board = SudokuBoard()
+    board.generate_full_board()
+    board.remove_numbers("medium")
+    restored = SudokuBoard.from_bytes(board.to_bytes())
+    assert restored.get_board() == board.get_board()
+    assert restored.get_solution() == board.get_solution()
+    assert restored.row_mask == board.row_mask
+    assert restored.col_mask == board.col_mask
+    assert restored.box_mask == board.box_mask
+    # The arrays must not be read-only views of the bytes
+    assert restored.board.flags.writeable and restored.solution.flags.writeable
+    row, col = next(
+        (row, col) for row in range(9) for col in range(9)
+        if not board.get_board()[row][col]
+    )
+    restored.place(row, col, restored.get_solution()[row][col])
+    restored.solution[0, 0] = 0
+    assert board.get_board()[row][col] == 0
+    assert board.get_solution()[0][0] != 0
+
+def check(lines, label, result, expected, verbose, args=()):
+    """Record one reported check and, if verbose, its report line.
     
-    # Create a simple test case
-    # Place a 5 at position (0,0) - top-left of first 3x3 box
-    board.board[0][0] = 5
+    The label is %-formatted with args, and only when the line is needed.
+    """
+    CHECKS.append(result == expected)
+    if verbose:
+        lines.append(label % args + STATUS[expected][result])
+
+def report_3x3_constraint(verbose=True, out=None):
+    """Report on the 3x3 box constraint to out (default stdout)."""
+    board = board_with([(0, 0, 5)])
     
-    # Try to place another 5 in the same 3x3 box
-    # Should fail at any other position in the box
-    test_positions = [
-        (0, 1), (0, 2),  # Same row, same box
-        (1, 0), (1, 1), (1, 2),  # Second row, same box
-        (2, 0), (2, 1), (2, 2)   # Third row, same box
+    # Output is collected and written once at the end
+    lines = [
+        "Testing 3x3 box constraint:",
+        "Board has 5 at position (0,0)",
+        "\nTrying to place 5 at other positions in the same 3x3 box:",
     ]
     
-    print("Testing 3x3 box constraint:")
-    print(f"Board has 5 at position (0,0)")
-    print(f"\nTrying to place 5 at other positions in the same 3x3 box:")
+    rows, cols = zip(*BOX_POSITIONS)
+    results = board.are_valid_moves(rows, cols, [5] * len(BOX_POSITIONS)).tolist()
+    for (row, col), result in zip(BOX_POSITIONS, results):
+        check(lines, POSITION_TPL, result, False, verbose, (row, col))
     
-    for row, col in test_positions:
+    lines.append("\nTrying to place 5 in a different 3x3 box:")
+    for row, col, allowed in OUTSIDE_BOX:
         result = board.is_valid_move(row, col, 5)
-        status = "❌ ALLOWED (BUG!)" if result else "✅ BLOCKED (correct)"
-        print(f"  Position ({row},{col}): {status}")
-    
-    # Test that we CAN place 5 in a different 3x3 box
-    print(f"\nTrying to place 5 in a different 3x3 box:")
-    result = board.is_valid_move(0, 3, 5)  # Different box (same row)
-    status = "✅ ALLOWED (correct)" if result else "❌ BLOCKED (BUG!)"
-    print(f"  Position (0,3): {status}")
-    
-    result = board.is_valid_move(3, 0, 5)  # Different box (same column)
-    status = "✅ ALLOWED (correct)" if result else "❌ BLOCKED (BUG!)"
-    print(f"  Position (3,0): {status}")
+        check(lines, POSITION_TPL, result, allowed, verbose, (row, col))
     
     # More comprehensive test with multiple numbers
-    print("\n" + "="*50)
-    print("Comprehensive 3x3 box test:")
-    print("="*50)
-    
-    board2 = SudokuBoard()
-    # Fill first 3x3 box with numbers 1-9
-    board2.board[0][0] = 1
-    board2.board[0][1] = 2
-    board2.board[0][2] = 3
-    board2.board[1][0] = 4
-    board2.board[1][1] = 5
-    board2.board[1][2] = 6
-    board2.board[2][0] = 7
-    board2.board[2][1] = 8
-    # Position (2,2) is empty
+    lines.append("\n" + "="*50)
+    lines.append("Comprehensive 3x3 box test:")
+    lines.append("="*50)
     
-    print("\nFirst 3x3 box contains: 1,2,3,4,5,6,7,8 (9 is missing)")
-    print("Position (2,2) is empty")
+    board2 = SudokuBoard.from_string(BOX_PUZZLE)
+    lines.append("\nFirst 3x3 box contains: 1,2,3,4,5,6,7,8 (9 is missing)")
+    lines.append("Position (2,2) is empty")
     
-    # Try placing 9 (should work)
     result = board2.is_valid_move(2, 2, 9)
-    print(f"\nTrying to place 9 at (2,2): {'✅ ALLOWED (correct)' if result else '❌ BLOCKED (BUG!)'}")
+    check(lines, "\nTrying to place 9 at (2,2): ", result, True, verbose)
     
-    # Try placing any other number 1-8 (should fail)
-    print("\nTrying to place numbers 1-8 at (2,2) (all should be blocked):")
+    lines.append("\nTrying to place numbers 1-8 at (2,2) (all should be blocked):")
+    allowed = board2.candidates(2, 2)
     for num in range(1, 9):
-        result = board2.is_valid_move(2, 2, num)
-        status = "❌ ALLOWED (BUG!)" if result else "✅ BLOCKED (correct)"
-        print(f"  Number {num}: {status}")
+        result = bool(allowed & (1 << (num - 1)))
+        check(lines, NUMBER_TPL, result, False, verbose, (num,))
+    
+    if verbose:
+        (out or sys.stdout).write("\n".join(lines) + "\n")
 
-def test_row_and_column():
-    """Test row and column constraints."""
-    board = SudokuBoard()
+def report_row_and_column(verbose=True, out=None):
+    """Report on the row and column constraints to out (default stdout)."""
+    board = board_with([(0, 0, 7)])
     
-    print("\n" + "="*50)
-    print("Testing Row and Column constraints:")
-    print("="*50)
+    lines = [
+        "\n" + "="*50,
+        "Testing Row and Column constraints:",
+        "="*50,
+        "\nBoard has 7 at position (0,0)",
+    ]
     
-    # Test row constraint
-    board.board[0][0] = 7
-    print("\nBoard has 7 at position (0,0)")
-    result = board.is_valid_move(0, 8, 7)  # Same row, different box
-    print(f"Trying to place 7 at (0,8) same row: {'❌ ALLOWED (BUG!)' if result else '✅ BLOCKED (correct)'}")
+    for (row, col), line in zip(LINE_POSITIONS, ("row", "column")):
+        result = board.is_valid_move(row, col, 7)
+        check(lines, LINE_TPL, result, False, verbose, (row, col, line))
     
-    # Test column constraint
-    board2 = SudokuBoard()
-    board2.board[0][0] = 7
-    result = board2.is_valid_move(8, 0, 7)  # Same column, different box
-    print(f"Trying to place 7 at (8,0) same column: {'❌ ALLOWED (BUG!)' if result else '✅ BLOCKED (correct)'}")
+    if verbose:
+        (out or sys.stdout).write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
-    test_3x3_constraint()
-    test_row_and_column()
-    print("\n" + "="*50)
-    print("Test complete!")
-    print("="*50)
+    # -q skips the per-check report and prints only the summary
+    verbose = not {"-q", "--quiet"} & set(sys.argv[1:])
+    # The reports run side by side, each into its own buffer, and are
+    # written out in order once both are done
+    reports = [report_3x3_constraint, report_row_and_column]
+    buffers = [io.StringIO() for _ in reports]
+    with ThreadPoolExecutor(max_workers=len(reports)) as pool:
+        list(pool.map(lambda report, out: report(verbose, out), reports, buffers))
+    sys.stdout.write("".join(buffer.getvalue() for buffer in buffers))
+    if verbose:
+        print("\n" + "="*50)
+        print("Test complete!")
+        print("="*50)
+    fails = CHECKS.count(False)
+    print(f"{len(CHECKS) - fails} checks passed, {fails} failed")
+    # A non-zero status lets CI (tox) fail the run
+    sys.exit(1 if fails else 0)